@@ -22,6 +22,13 @@ class PostAdmin(admin.ModelAdmin):
     ]
     ordering = ['-published_at']
 
+    def formfield_for_manytomany(self, db_field, request, **kwargs):
+        # У PostTag и PostLike нет своих полей, поэтому связи можно
+        # редактировать обычным виджетом, как автоматические M2M
+        if db_field.name in ('tags', 'likes'):
+            return db_field.formfield(**kwargs)
+        return super().formfield_for_manytomany(db_field, request, **kwargs)
+
 
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
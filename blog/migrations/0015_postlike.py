@@ -0,0 +1,78 @@
+# Generated by Django 5.2 on 2026-10-14 05:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0014_alter_post_published_at_alter_tag_title"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    # Таблица blog_post_likes уже существует как автоматическая M2M-связь:
+    # описываем её моделью, данные остаются на месте.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name="PostLike",
+                    fields=[
+                        (
+                            "id",
+                            models.AutoField(
+                                auto_created=True,
+                                primary_key=True,
+                                serialize=False,
+                                verbose_name="ID",
+                            ),
+                        ),
+                        (
+                            "post",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                to="blog.post",
+                                verbose_name="Пост",
+                            ),
+                        ),
+                        (
+                            "user",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                to=settings.AUTH_USER_MODEL,
+                                verbose_name="Кто лайкнул",
+                            ),
+                        ),
+                    ],
+                    options={
+                        "verbose_name": "лайк",
+                        "verbose_name_plural": "лайки",
+                        "db_table": "blog_post_likes",
+                        "unique_together": {("post", "user")},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name="post",
+                    name="likes",
+                    field=models.ManyToManyField(
+                        blank=True,
+                        related_name="liked_posts",
+                        through="blog.PostLike",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Кто лайкнул",
+                    ),
+                ),
+            ],
+        ),
+        # Автоматическая M2M-связь создавалась с 32-битным id в старых базах
+        # и с 64-битным в новых (по DEFAULT_AUTO_FIELD): приводим все к BigAutoField.
+        migrations.AlterField(
+            model_name="postlike",
+            name="id",
+            field=models.BigAutoField(
+                auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+            ),
+        ),
+    ]
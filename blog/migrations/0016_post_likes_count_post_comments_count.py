@@ -0,0 +1,49 @@
+# Generated by Django 5.2 on 2026-10-14 05:30
+
+from django.db import migrations, models
+from django.db.models import F, Func, IntegerField, OuterRef, Subquery
+
+
+def fill_counters(apps, schema_editor):
+    Post = apps.get_model("blog", "Post")
+    PostLike = apps.get_model("blog", "PostLike")
+    Comment = apps.get_model("blog", "Comment")
+
+    def count_subquery(model):
+        return Subquery(
+            model.objects.filter(post_id=OuterRef("pk"))
+            .order_by()
+            .annotate(cnt=Func(F("id"), function="COUNT"))
+            .values("cnt"),
+            output_field=IntegerField(),
+        )
+
+    Post.objects.update(
+        likes_count=count_subquery(PostLike),
+        comments_count=count_subquery(Comment),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0015_postlike"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="comments_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Количество комментариев"
+            ),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="likes_count",
+            field=models.PositiveIntegerField(
+                db_index=True, default=0, editable=False, verbose_name="Количество лайков"
+            ),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-14 05:14
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0016_post_likes_count_post_comments_count"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SidebarSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.PositiveSmallIntegerField(
+                        default=1, primary_key=True, serialize=False
+                    ),
+                ),
+                (
+                    "payload",
+                    models.JSONField(
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        verbose_name="Сериализованный сайдбар",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Когда обновлён"),
+                ),
+            ],
+            options={
+                "verbose_name": "снимок сайдбара",
+                "verbose_name_plural": "снимки сайдбара",
+            },
+        ),
+    ]
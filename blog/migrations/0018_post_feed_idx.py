@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-14 05:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0017_sidebarsnapshot"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(fields=["-published_at"], name="post_feed_idx"),
+        ),
+        migrations.AlterField(
+            model_name="post",
+            name="published_at",
+            field=models.DateTimeField(verbose_name="Дата и время публикации"),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2 on 2026-10-14 05:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0018_post_feed_idx"),
+    ]
+
+    # Таблица blog_post_tags уже существует как автоматическая M2M-связь:
+    # описываем её моделью, данные остаются на месте.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name="PostTag",
+                    fields=[
+                        (
+                            "id",
+                            models.AutoField(
+                                auto_created=True,
+                                primary_key=True,
+                                serialize=False,
+                                verbose_name="ID",
+                            ),
+                        ),
+                        (
+                            "post",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                to="blog.post",
+                                verbose_name="Пост",
+                            ),
+                        ),
+                        (
+                            "tag",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                to="blog.tag",
+                                verbose_name="Тег",
+                            ),
+                        ),
+                    ],
+                    options={
+                        "verbose_name": "тег поста",
+                        "verbose_name_plural": "теги постов",
+                        "db_table": "blog_post_tags",
+                        "unique_together": {("post", "tag")},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name="post",
+                    name="tags",
+                    field=models.ManyToManyField(
+                        related_name="posts",
+                        through="blog.PostTag",
+                        to="blog.tag",
+                        verbose_name="Теги",
+                    ),
+                ),
+            ],
+        ),
+        # Автоматическая M2M-связь создавалась с 32-битным id в старых базах
+        # и с 64-битным в новых (по DEFAULT_AUTO_FIELD): приводим все к BigAutoField.
+        migrations.AlterField(
+            model_name="posttag",
+            name="id",
+            field=models.BigAutoField(
+                auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="posttag",
+            index=models.Index(fields=["tag", "post"], name="post_tags_tag_post_idx"),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-14 05:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0019_posttag"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="post",
+            name="post_feed_idx",
+        ),
+        migrations.AlterField(
+            model_name="post",
+            name="published_at",
+            field=models.DateTimeField(db_index=True, verbose_name="Дата и время публикации"),
+        ),
+    ]
@@ -1,49 +1,37 @@
 from django.db import models
 from django.urls import reverse
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db.models import Count
 from django.db.models import OuterRef, Subquery, IntegerField
 from django.db.models.functions import Coalesce
 
 
 class PostQuerySet(models.QuerySet):
-    def with_likes_count(self):
-        """Добавляет поле likes_count через подзапрос без тяжёлого GROUP BY."""
-        through = Post.likes.through  # таблица связи M2M
-        likes_subquery = (
-            through.objects
-            .filter(post_id=OuterRef("pk"))
-            .values("post_id")
-            .annotate(cnt=Count("id"))
-            .values("cnt")[:1]
-        )
+    def popular(self):
+        """Сортирует посты по денормализованному счётчику лайков: ORDER BY + LIMIT идёт по индексу."""
+        return self.order_by("-likes_count")
 
-        return self.annotate(
-            likes_count=Coalesce(Subquery(likes_subquery, output_field=IntegerField()), 0)
-        )
 
-    def with_comments_count(self):
-        """Добавляет поле comments_count через подзапрос."""
-        comments_subquery = (
-            Comment.objects
-            .filter(post_id=OuterRef("pk"))
-            .values("post_id")
-            .annotate(cnt=Count("id"))
+class TagQuerySet(models.QuerySet):
+    def with_posts_count(self):
+        """Добавляет поле posts_with_tag через подзапрос, чтобы счётчик не ломался внутри Prefetch по постам."""
+        through = Post.tags.through
+        posts_subquery = (
+            through.objects
+            .filter(tag_id=OuterRef("pk"))
+            .values("tag_id")
+            .annotate(cnt=Count("post_id"))
             .values("cnt")[:1]
         )
 
         return self.annotate(
-            comments_count=Coalesce(Subquery(comments_subquery, output_field=IntegerField()), 0)
+            posts_with_tag=Coalesce(Subquery(posts_subquery, output_field=IntegerField()), 0)
         )
 
-
-class TagQuerySet(models.QuerySet):
     def popular(self):
         """Сортирует теги по количеству использующих их постов и добавляет количество под именем posts_with_tag для шаблонов."""
-        return (
-            self.annotate(posts_with_tag=Count("posts"))
-            .order_by("-posts_with_tag")
-        )
+        return self.with_posts_count().order_by("-posts_with_tag")
 
 
 class Post(models.Model):
@@ -52,6 +40,12 @@ class Post(models.Model):
     slug = models.SlugField("Название в виде url", max_length=200)
     image = models.ImageField("Картинка")
     published_at = models.DateTimeField("Дата и время публикации", db_index=True)
+    likes_count = models.PositiveIntegerField(
+        "Количество лайков", default=0, db_index=True, editable=False
+    )
+    comments_count = models.PositiveIntegerField(
+        "Количество комментариев", default=0, editable=False
+    )
 
     author = models.ForeignKey(
         User,
@@ -60,9 +54,15 @@ class Post(models.Model):
         limit_choices_to={"is_staff": True},
     )
     likes = models.ManyToManyField(
-        User, related_name="liked_posts", verbose_name="Кто лайкнул", blank=True
+        User,
+        through="PostLike",
+        related_name="liked_posts",
+        verbose_name="Кто лайкнул",
+        blank=True,
+    )
+    tags = models.ManyToManyField(
+        "Tag", through="PostTag", related_name="posts", verbose_name="Теги"
     )
-    tags = models.ManyToManyField("Tag", related_name="posts", verbose_name="Теги")
 
     objects = PostQuerySet.as_manager()
 
@@ -78,6 +78,37 @@ class Post(models.Model):
         verbose_name_plural = "посты"
 
 
+class PostLike(models.Model):
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, verbose_name="Пост")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Кто лайкнул")
+
+    def __str__(self):
+        return f"{self.user.username} likes {self.post.title}"
+
+    class Meta:
+        db_table = "blog_post_likes"
+        unique_together = [("post", "user")]
+        verbose_name = "лайк"
+        verbose_name_plural = "лайки"
+
+
+class PostTag(models.Model):
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, verbose_name="Пост")
+    tag = models.ForeignKey("Tag", on_delete=models.CASCADE, verbose_name="Тег")
+
+    def __str__(self):
+        return f"{self.post.title} #{self.tag.title}"
+
+    class Meta:
+        db_table = "blog_post_tags"
+        unique_together = [("post", "tag")]
+        indexes = [
+            models.Index(fields=["tag", "post"], name="post_tags_tag_post_idx"),
+        ]
+        verbose_name = "тег поста"
+        verbose_name_plural = "теги постов"
+
+
 class Tag(models.Model):
     title = models.CharField("Тег", max_length=20, unique=True, db_index=True)
 
@@ -114,3 +145,18 @@ class Comment(models.Model):
         ordering = ["published_at"]
         verbose_name = "комментарий"
         verbose_name_plural = "комментарии"
+
+
+class SidebarSnapshot(models.Model):
+    SINGLETON_ID = 1
+
+    id = models.PositiveSmallIntegerField(primary_key=True, default=SINGLETON_ID)
+    payload = models.JSONField("Сериализованный сайдбар", encoder=DjangoJSONEncoder)
+    updated_at = models.DateTimeField("Когда обновлён", auto_now=True)
+
+    def __str__(self):
+        return f"sidebar snapshot at {self.updated_at}"
+
+    class Meta:
+        verbose_name = "снимок сайдбара"
+        verbose_name_plural = "снимки сайдбара"
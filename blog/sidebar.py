@@ -0,0 +1,4 @@
+"""Настройки кеша сайдбара, общие для вьюх и сигналов."""
+
+SIDEBAR_CACHE_KEY = "blog:sidebar:v1"
+SIDEBAR_CACHE_TIMEOUT = 300
@@ -0,0 +1,136 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Func, IntegerField, OuterRef, Subquery
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from blog.models import Comment, Post, PostLike, SidebarSnapshot, Tag
+from blog.sidebar import SIDEBAR_CACHE_KEY
+
+
+def recount_counter(post_ids, counter, model):
+    """Пересчитывает денормализованный счётчик постов по связанной таблице model."""
+    count_subquery = (
+        model.objects
+        .filter(post_id=OuterRef("pk"))
+        .order_by()
+        .annotate(cnt=Func(F("id"), function="COUNT"))
+        .values("cnt")
+    )
+    Post.objects.filter(pk__in=post_ids).update(
+        **{counter: Subquery(count_subquery, output_field=IntegerField())}
+    )
+
+
+def recount_likes(post_ids):
+    recount_counter(post_ids, "likes_count", PostLike)
+
+
+@receiver(m2m_changed, sender=PostLike)
+def update_likes_count(instance, action, reverse, pk_set, **kwargs):
+    """Пересчитывает Post.likes_count после add(), remove() и clear() с любой стороны связи.
+
+    Затронутые посты пересчитываются одним UPDATE по индексу таблицы связи: add() и remove()
+    передают pk_set как есть, поэтому простой F() + delta мог бы разойтись с реальным числом лайков.
+    """
+    if action == "pre_remove":
+        instance._liked_post_ids = list(pk_set) if reverse else [instance.pk]
+    elif action == "pre_clear":
+        # после clear() pk_set пуст, поэтому запоминаем посты заранее
+        instance._liked_post_ids = (
+            list(instance.liked_posts.values_list("pk", flat=True))
+            if reverse else [instance.pk]
+        )
+    elif action == "post_add" and pk_set:
+        recount_likes(pk_set if reverse else [instance.pk])
+    elif action in ("post_remove", "post_clear"):
+        recount_likes(instance.__dict__.pop("_liked_post_ids", []))
+
+
+@receiver(pre_delete, sender=User)
+def remember_liked_posts(instance, **kwargs):
+    # лайки удалённого пользователя уходят каскадом, без m2m_changed
+    instance._liked_post_ids = list(instance.liked_posts.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=User)
+def recount_likes_of_deleted_user(instance, **kwargs):
+    liked_post_ids = instance.__dict__.pop("_liked_post_ids", [])
+    if liked_post_ids:
+        recount_likes(liked_post_ids)
+        schedule_sidebar_reset()
+
+
+@receiver(pre_save, sender=Comment)
+def remember_comment_post(instance, **kwargs):
+    # CommentAdmin позволяет перенести комментарий к другому посту
+    instance._previous_post_id = (
+        Comment.objects
+        .filter(pk=instance.pk)
+        .values_list("post_id", flat=True)
+        .first()
+    ) if instance.pk else None
+
+
+@receiver(post_save, sender=Comment)
+def increment_comments_count(instance, created, **kwargs):
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(
+            comments_count=F("comments_count") + 1
+        )
+        return
+
+    previous_post_id = instance.__dict__.pop("_previous_post_id", None)
+    if previous_post_id is not None and previous_post_id != instance.post_id:
+        recount_counter([previous_post_id, instance.post_id], "comments_count", Comment)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comments_count(instance, **kwargs):
+    Post.objects.filter(pk=instance.post_id).update(
+        comments_count=F("comments_count") - 1
+    )
+
+
+def reset_sidebar():
+    SidebarSnapshot.objects.all().delete()
+    cache.delete(SIDEBAR_CACHE_KEY)
+
+
+def schedule_sidebar_reset():
+    """Ставит сброс сайдбара на коммит транзакции, не больше одного раза на транзакцию.
+
+    Сброс откладывается до коммита, иначе параллельный запрос успел бы пересобрать снимок
+    по старым данным. При откате транзакции или savepoint Django сам убирает колбэк из
+    run_on_commit, поэтому повторная проверка по этому списку остаётся верной.
+    """
+    connection = transaction.get_connection()
+    if any(callback is reset_sidebar for _, callback, *_ in connection.run_on_commit):
+        return
+    transaction.on_commit(reset_sidebar)
+
+
+# Подключены после счётчиков: к сбросу сайдбара счётчики постов уже обновлены
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_sidebar(**kwargs):
+    """Сбрасывает сайдбар в кеше и в базе, когда меняются посты, теги, комментарии или лайки."""
+    schedule_sidebar_reset()
+
+
+@receiver(m2m_changed, sender=PostLike)
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_sidebar_on_m2m(action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        schedule_sidebar_reset()
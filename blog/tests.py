@@ -0,0 +1,222 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Comment, Post, SidebarSnapshot, Tag
+from blog.sidebar import SIDEBAR_CACHE_KEY, SIDEBAR_CACHE_TIMEOUT
+
+
+class IndexQueriesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username="author", is_staff=True)
+        self.tags = [Tag.objects.create(title=f"tag{number}") for number in range(6)]
+        self.posts = [
+            Post.objects.create(
+                title=f"Post {number}",
+                text="text " * 100,
+                slug=f"post-{number}",
+                image=f"post-{number}.jpg",
+                published_at=timezone.now(),
+                author=self.author,
+            )
+            for number in range(6)
+        ]
+        for post in self.posts:
+            post.tags.set(self.tags[:1])
+
+    def reset_sidebar(self):
+        cache.clear()
+        SidebarSnapshot.objects.all().delete()
+
+    def count_index_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("index"))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_cold_sidebar_queries_do_not_depend_on_tags_count(self):
+        self.reset_sidebar()
+        queries_with_one_tag = self.count_index_queries()
+
+        for post in self.posts:
+            post.tags.set(self.tags)
+        self.reset_sidebar()
+
+        with self.assertNumQueries(queries_with_one_tag):
+            self.client.get(reverse("index"))
+
+    def test_warm_sidebar_queries_do_not_depend_on_tags_count(self):
+        self.count_index_queries()
+        queries_with_one_tag = self.count_index_queries()
+
+        for post in self.posts:
+            post.tags.set(self.tags)
+        self.count_index_queries()
+
+        with self.assertNumQueries(queries_with_one_tag):
+            self.client.get(reverse("index"))
+
+
+class PostCountersTest(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create(username=f"user{number}") for number in range(3)]
+        self.posts = [
+            Post.objects.create(
+                title=f"Post {number}",
+                text="text",
+                slug=f"post-{number}",
+                published_at=timezone.now(),
+                author=self.users[0],
+            )
+            for number in range(2)
+        ]
+
+    def assertCountersMatch(self):
+        for post in Post.objects.all():
+            self.assertEqual(post.likes_count, post.likes.count())
+            self.assertEqual(post.comments_count, post.comments.count())
+
+    def create_comment(self, post):
+        return Comment.objects.create(
+            post=post, author=self.users[0], text="comment", published_at=timezone.now()
+        )
+
+    def test_likes_count_follows_add_remove_and_clear(self):
+        post = self.posts[0]
+        post.likes.add(*self.users)
+        post.likes.add(self.users[0])
+        self.assertCountersMatch()
+
+        post.likes.remove(self.users[0])
+        post.likes.remove(self.users[0])
+        self.assertCountersMatch()
+
+        self.users[1].liked_posts.add(self.posts[1])
+        self.users[1].liked_posts.clear()
+        self.assertCountersMatch()
+
+        post.likes.clear()
+        self.assertCountersMatch()
+
+    def test_likes_count_drops_when_user_is_deleted(self):
+        for post in self.posts:
+            post.likes.set(self.users)
+
+        self.users[2].delete()
+
+        self.assertCountersMatch()
+
+    def test_clear_recounts_likes_once(self):
+        post = self.posts[0]
+        post.likes.set(self.users)
+        with CaptureQueriesContext(connection) as queries:
+            post.likes.clear()
+        queries_for_few_likes = len(queries)
+
+        likers = [User.objects.create(username=f"liker{number}") for number in range(100)]
+        post.likes.set(likers)
+        with self.assertNumQueries(queries_for_few_likes):
+            post.likes.clear()
+        self.assertCountersMatch()
+
+    def test_user_delete_recounts_likes_once(self):
+        few_likes_user, many_likes_user = self.users[1:]
+        self.posts[0].likes.add(few_likes_user)
+        for number in range(50):
+            Post.objects.create(
+                title=f"Liked {number}",
+                text="text",
+                slug=f"liked-{number}",
+                published_at=timezone.now(),
+                author=self.users[0],
+            ).likes.add(many_likes_user)
+
+        with CaptureQueriesContext(connection) as queries:
+            few_likes_user.delete()
+        with self.assertNumQueries(len(queries)):
+            many_likes_user.delete()
+        self.assertCountersMatch()
+
+    def test_comments_count_follows_moved_comment(self):
+        comment = self.create_comment(self.posts[0])
+        self.create_comment(self.posts[0])
+
+        comment.post = self.posts[1]
+        comment.save()
+        self.assertCountersMatch()
+
+        comment.delete()
+        self.assertCountersMatch()
+
+
+class SidebarInvalidationTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="user", is_staff=True)
+        self.post = Post.objects.create(
+            title="Post",
+            text="text",
+            slug="post",
+            published_at=timezone.now(),
+            author=self.user,
+        )
+        self.client.get(reverse("index"))
+
+    def test_like_resets_sidebar_after_commit(self):
+        with transaction.atomic():
+            self.post.likes.add(self.user)
+            self.assertTrue(SidebarSnapshot.objects.exists())
+            self.assertIsNotNone(cache.get(SIDEBAR_CACHE_KEY))
+
+        self.assertFalse(SidebarSnapshot.objects.exists())
+        self.assertIsNone(cache.get(SIDEBAR_CACHE_KEY))
+
+        response = self.client.get(reverse("index"))
+        self.assertEqual(response.context["most_popular_posts"][0]["likes_amount"], 1)
+
+    def test_one_reset_per_transaction(self):
+        with transaction.atomic():
+            with TestCase.captureOnCommitCallbacks() as callbacks:
+                self.post.likes.add(self.user)
+                self.post.likes.clear()
+                self.post.tags.add(Tag.objects.create(title="tag"))
+                Comment.objects.create(
+                    post=self.post, author=self.user, text="comment", published_at=timezone.now()
+                )
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(SidebarSnapshot.objects.exists())
+
+    def test_deleted_liker_resets_sidebar(self):
+        liker = User.objects.create(username="liker")
+        self.post.likes.add(liker)
+        self.client.get(reverse("index"))
+
+        liker.delete()
+
+        self.assertFalse(SidebarSnapshot.objects.exists())
+        response = self.client.get(reverse("index"))
+        self.assertEqual(response.context["most_popular_posts"][0]["likes_amount"], 0)
+
+    def test_expired_snapshot_picks_up_changes_without_signals(self):
+        User.objects.filter(pk=self.user.pk).update(username="renamed")
+        Post.objects.filter(pk=self.post.pk).update(title="Renamed post")
+        cache.clear()
+
+        stale_post = self.client.get(reverse("index")).context["most_popular_posts"][0]
+        self.assertEqual((stale_post["title"], stale_post["author"]), ("Post", "user"))
+
+        SidebarSnapshot.objects.update(
+            updated_at=timezone.now() - timedelta(seconds=SIDEBAR_CACHE_TIMEOUT + 1)
+        )
+        cache.clear()
+
+        fresh_post = self.client.get(reverse("index")).context["most_popular_posts"][0]
+        self.assertEqual((fresh_post["title"], fresh_post["author"]), ("Renamed post", "renamed"))
@@ -1,61 +1,127 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.shortcuts import render, get_object_or_404
-from blog.models import Comment, Post, Tag
-from django.db.models import Prefetch
+from blog.models import Comment, Post, SidebarSnapshot, Tag
+from blog.sidebar import SIDEBAR_CACHE_KEY, SIDEBAR_CACHE_TIMEOUT
+from django.db.models import Prefetch, prefetch_related_objects
+from django.db.models.functions import Substr
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import filepath_to_uri
 
 
-def get_common_context():
-    """Общие данные для всех шаблонов: популярные теги и посты."""
-    popular_tags = Tag.objects.popular()[:5]
+def build_sidebar_payload(*, prefetch_together=()):
+    """Считает популярные теги и посты для сайдбара и сериализует их в простые словари.
 
-    popular_posts_qs = (
-        get_posts_with_prefetched_data()
-        .order_by("-likes_count")
-    )[:5]
+    Посты из prefetch_together получают авторов и теги тем же батчем, что и посты сайдбара.
+    """
+    popular_tags = [serialize_tag(tag) for tag in Tag.objects.popular()[:5]]
 
-    popular_posts = [serialize_post(post) for post in popular_posts_qs]
+    popular_posts = list(get_posts_queryset().popular()[:5])
+    prefetch_post_relations(popular_posts + list(prefetch_together))
 
     return {
         "popular_tags": popular_tags,
-        "most_popular_posts": popular_posts,
+        "most_popular_posts": [serialize_post(post) for post in popular_posts],
     }
 
 
-def get_tags_with_posts_count():
-    return Tag.objects.popular()
-
-
-def get_posts_with_prefetched_data():
-    """Оптимизированный QuerySet для постов c выбранными полями, тегами, лайками и комментариями."""
+def get_common_context(*, prefetch_together=()):
+    """Общие данные для всех шаблонов: популярные теги и посты.
+
+    Берутся из кеша, затем из SidebarSnapshot; пересчитываются, если снимок сброшен в blog.signals
+    или старше SIDEBAR_CACHE_TIMEOUT — так изменения без сигналов тоже видны не позже таймаута.
+    Если сайдбар пересобирается, посты из prefetch_together догружаются вместе с его постами;
+    вьюхи всё равно вызывают для своих постов prefetch_post_relations — уже загруженное повторно не запрашивается.
+    """
+    context = cache.get(SIDEBAR_CACHE_KEY)
+    if context is not None:
+        return context
+
+    now = timezone.now()
+    snapshot = (
+        SidebarSnapshot.objects
+        .filter(
+            pk=SidebarSnapshot.SINGLETON_ID,
+            updated_at__gte=now - timedelta(seconds=SIDEBAR_CACHE_TIMEOUT),
+        )
+        .only("payload", "updated_at")
+        .first()
+    )
+    if snapshot is None:
+        context = build_sidebar_payload(prefetch_together=prefetch_together)
+        SidebarSnapshot.objects.update_or_create(
+            pk=SidebarSnapshot.SINGLETON_ID,
+            defaults={"payload": context},
+        )
+        timeout = SIDEBAR_CACHE_TIMEOUT
+    else:
+        context = snapshot.payload
+        # в JSON даты хранятся строками, а шаблоны форматируют их фильтром date
+        for post in context["most_popular_posts"]:
+            post["published_at"] = parse_datetime(post["published_at"])
+        # кеш не должен пережить сам снимок, иначе устаревание сложилось бы из двух таймаутов
+        snapshot_age = (now - snapshot.updated_at).total_seconds()
+        timeout = max(1, int(SIDEBAR_CACHE_TIMEOUT - snapshot_age))
+
+    cache.set(SIDEBAR_CACHE_KEY, context, timeout)
+    return context
+
+
+def get_posts_queryset():
+    """QuerySet для карточек постов. Лайки и комментарии — денормализованные поля поста, вместо полного текста из базы приходит только анонс."""
     return (
         Post.objects
-        .select_related("author")
-        .prefetch_related(Prefetch("tags", queryset=Tag.objects.only("title")))
-        .with_likes_count()
-        .with_comments_count()
+        .annotate(teaser_text=Substr("text", 1, 200))
+        .defer("text")
     )
 
 
+def prefetch_post_relations(posts):
+    """Догружает авторов и теги сразу для всех переданных постов: по одному запросу на связь."""
+    prefetch_related_objects(
+        list(posts),
+        Prefetch("author", queryset=User.objects.only("id", "username")),
+        # only() должен покрывать все поля, которые читает serialize_tag, иначе каждый тег догрузится отдельным запросом
+        Prefetch("tags", queryset=Tag.objects.with_posts_count().only("id", "title")),
+    )
+
+
+def serialize_tag(tag: Tag) -> dict:
+    """Сериализация тега для шаблонов. Количество постов берётся из аннотации, без отдельного COUNT."""
+    return {
+        "title": tag.title,
+        "posts_with_tag": getattr(tag, "posts_with_tag", 0),
+    }
+
+
 def serialize_post(post: Post) -> dict:
     """Сериализация поста для шаблонов."""
+    tags = list(post.tags.all())
     return {
         "title": post.title,
-        "teaser_text": post.text[:200],
+        "teaser_text": post.teaser_text,
         "author": post.author.username,
-        "comments_amount": getattr(post, "comments_count", 0),
-        "likes_amount": getattr(post, "likes_count", 0),
-        "image_url": post.image.url if post.image else None,
+        "comments_amount": post.comments_count,
+        "likes_amount": post.likes_count,
+        "image_url": f"{settings.MEDIA_URL}{filepath_to_uri(post.image.name)}" if post.image else None,
         "published_at": post.published_at,
         "slug": post.slug,
-        "tags": list(post.tags.all()),
-        "first_tag_title": post.tags.first().title if post.tags.exists() else None,
+        "tags": [serialize_tag(tag) for tag in tags],
+        "first_tag_title": tags[0].title if tags else None,
     }
 
 
 def index(request):
-    fresh_posts = get_posts_with_prefetched_data().order_by("-published_at")[:5]
+    fresh_posts = list(get_posts_queryset().order_by("-published_at")[:5])
+    common_context = get_common_context(prefetch_together=fresh_posts)
+    prefetch_post_relations(fresh_posts)
 
     context = {
-        **get_common_context(),
+        **common_context,
         "page_posts": [serialize_post(post) for post in fresh_posts],
     }
     return render(request, "index.html", context)
@@ -63,19 +129,19 @@ def index(request):
 
 def post_detail(request, slug: str):
     post = get_object_or_404(
-        Post.objects
+        get_posts_queryset()
+        .defer(None)
         .select_related("author")
         .prefetch_related(
-            "tags",
             Prefetch(
                 "comments",
                 queryset=Comment.objects.select_related("author"),
             ),
-        )
-        .with_likes_count()
-        .with_comments_count(),
+        ),
         slug=slug,
     )
+    common_context = get_common_context(prefetch_together=[post])
+    prefetch_post_relations([post])
 
     post_data = serialize_post(post)
     post_data["text"] = post.text
@@ -89,7 +155,7 @@ def post_detail(request, slug: str):
     ]
 
     context = {
-        **get_common_context(),
+        **common_context,
         "post": post_data,
     }
     return render(request, "post-details.html", context)
@@ -98,17 +164,16 @@ def post_detail(request, slug: str):
 def tag_filter(request, tag_title: str):
     tag = get_object_or_404(Tag, title=tag_title)
 
-    related_posts = (
-        tag.posts
-        .select_related("author")
-        .prefetch_related(Prefetch("tags", queryset=Tag.objects.only("title")))
-        .with_likes_count()
-        .with_comments_count()
+    related_posts = list(
+        get_posts_queryset()
+        .filter(tags=tag)
         .order_by("-published_at")[:20]
     )
+    common_context = get_common_context(prefetch_together=related_posts)
+    prefetch_post_relations(related_posts)
 
     context = {
-        **get_common_context(),
+        **common_context,
         "tag": tag.title,
         "posts": [serialize_post(post) for post in related_posts],
     }
@@ -69,6 +69,10 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    "default": env.dj_cache_url("CACHE_URL", "locmem://"),
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",  # noqa: E501